@@ -6,7 +6,7 @@ Two modes of operation:
   1. **rad app graph** (primary) — reads structured output from `rad app graph`
      via the RAD_GRAPH_OUTPUT env var. This is used in CI after Radius is
      installed in a Kind cluster.
-  2. **Direct Bicep parsing** (fallback) — regex-parses app.bicep directly.
+  2. **Direct Bicep parsing** (fallback) — scans app.bicep directly.
      Used locally or when `rad app graph` is not yet available.
 
 The generated Mermaid diagram uses GitHub's visual style (white background,
@@ -14,53 +14,244 @@ rounded-corner nodes, green/amber borders) and has clickable nodes that open
 the corresponding line in app.bicep on GitHub.
 """
 
-import json
+import bisect
 import re
 import os
+import shutil
 import sys
+import tempfile
+from pathlib import Path
+
+# orjson is optional: it decodes large `rad app graph` payloads several
+# times faster, but the stdlib parser is used when it isn't installed.
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+
+# Patterns are compiled once at import time rather than per resource.
+_RES_HEADER_RE = re.compile(r"resource\s+(\w+)\s+'([^']+)'\s*=\s*\{")
+_CONN_RE = re.compile(r"connections:\s*\{")
+_CONN_SOURCE_RE = re.compile(r"source:\s*'([^']+)'")
+# Scalar fields and `source: x.id` / `source: x.connectionString` references
+# extracted together in one pass over a resource body
+_BODY_FIELDS_RE = re.compile(
+    r"name:\s*'(?P<name>[^']+)'"
+    r"|image:\s*'(?P<image>[^']+)'"
+    r"|containerPort:\s*(?P<port>\d+)"
+    r"|source:\s*(?P<src>\w+)\.(?:id|connectionString)"
+)
+_URL_RE = re.compile(r"https?://([^:/]+)")
+_ARM_REF_RE = re.compile(r"\[reference\('(\w+)'\)")
+_NEWLINE_RE = re.compile(r"\n")
+
+# --- GitHub light theme styling ---
+# Matches GitHub's own dependency/action graph look:
+# white background, light gray borders, clean rounded-corner boxes
+_MERMAID_THEME_HEADER = (
+    "%%{ init: { 'theme': 'base', 'themeVariables': { "
+    "'primaryColor': '#ffffff', "
+    "'primaryTextColor': '#1f2328', "
+    "'primaryBorderColor': '#d1d9e0', "
+    "'lineColor': '#2da44e', "
+    "'secondaryColor': '#f6f8fa', "
+    "'tertiaryColor': '#ffffff', "
+    "'background': '#ffffff', "
+    "'mainBkg': '#ffffff', "
+    "'nodeBorder': '#d1d9e0', "
+    "'clusterBkg': '#f6f8fa', "
+    "'clusterBorder': '#d1d9e0', "
+    "'fontSize': '14px', "
+    "'fontFamily': '-apple-system, BlinkMacSystemFont, Segoe UI, Noto Sans, Helvetica, Arial, sans-serif'"
+    " } } }%%"
+)
+
+# Class definitions — GitHub light palette with rounded corners
+# Container: blue accent (like GitHub's blue links/actions)
+_CLASSDEF_CONTAINER = "    classDef container fill:#ffffff,stroke:#2da44e,stroke-width:1.5px,color:#1f2328,rx:6,ry:6"
+# Datastore: orange accent (like GitHub's warning/merge colors)
+_CLASSDEF_DATASTORE = "    classDef datastore fill:#ffffff,stroke:#d4a72c,stroke-width:1.5px,color:#1f2328,rx:6,ry:6"
+# Other: neutral gray
+_CLASSDEF_OTHER = "    classDef other fill:#ffffff,stroke:#d1d9e0,stroke-width:1.5px,color:#1f2328,rx:6,ry:6"
+
+# Mermaid class suffix for each node category (application nodes are not drawn)
+_CLASS_SUFFIX = {
+    "container": ":::container",
+    "datastore": ":::datastore",
+    "other": ":::other",
+}
+
+# Parsed results keyed by (parser, path, mtime_ns, size), so re-parsing an
+# unchanged file in the same process is free. Callers must not mutate them.
+_parse_cache = {}
+
+# Resource category keyed by the lower-cased last segment of the type,
+# e.g. "Applications.Datastores/redisCaches@2023-10-01-preview" -> "rediscaches".
+_CATEGORY_MAP = {
+    "containers": "container",
+    "rediscaches": "datastore",
+    "sqldatabases": "datastore",
+    "mongodatabases": "datastore",
+    "applications": "application",
+}
+
+
+def _categorize(resource_type):
+    """Map a resource type (with or without an API version) to a category."""
+    segment = resource_type.split("@", 1)[0].rsplit("/", 1)[-1].lower()
+    return _CATEGORY_MAP.get(segment, "other")
+
+
+def _cache_key(kind, path, f):
+    """Build a _parse_cache key from the stat of an already-open file."""
+    st = os.fstat(f.fileno())
+    return (kind, os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _skip_string(content, i):
+    """Return the index just past the Bicep string literal starting at content[i]."""
+    if content.startswith("'''", i):
+        end = content.find("'''", i + 3)
+        return len(content) if end == -1 else end + 3
+    i += 1
+    n = len(content)
+    while i < n:
+        ch = content[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "'" or ch == "\n":
+            return i + 1
+        i += 1
+    return n
 
 
-def parse_bicep(bicep_path):
-    """Parse a Bicep file and extract resources, connections, and line numbers."""
-    with open(bicep_path, "r") as f:
-        content = f.read()
+def _find_closing_brace(content, open_idx, comments=None):
+    """Return the index of the '}' matching the '{' at open_idx, or -1.
 
-    resources = []
-    connections = []
+    String literals and // or /* */ comments are skipped, so braces inside
+    them do not affect the depth count. If a `comments` list is given, the
+    (start, end) span of every comment walked over is appended to it.
+    """
+    depth = 0
+    i = open_idx
+    n = len(content)
+    while i < n:
+        ch = content[i]
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        elif ch == "'":
+            i = _skip_string(content, i)
+            continue
+        elif ch == "/" and content.startswith("//", i):
+            end = content.find("\n", i)
+            if comments is not None:
+                comments.append((i, n if end == -1 else end))
+            if end == -1:
+                return -1
+            i = end
+            continue
+        elif ch == "/" and content.startswith("/*", i):
+            end = content.find("*/", i + 2)
+            if comments is not None:
+                comments.append((i, n if end == -1 else end + 2))
+            if end == -1:
+                return -1
+            i = end + 2
+            continue
+        i += 1
+    return -1
 
-    resource_pattern = re.compile(
-        r"resource\s+(\w+)\s+'([^']+)'\s*=\s*\{(.*?)\n\}",
-        re.DOTALL,
-    )
 
-    for match in resource_pattern.finditer(content):
-        symbolic_name = match.group(1)
-        resource_type = match.group(2)
-        body = match.group(3)
+def _blank_spans(text, spans, base):
+    """Replace content[start:end] spans (offset by base) in text with spaces.
 
-        line_number = content[: match.start()].count("\n") + 1
+    Newlines are kept so offsets and line structure are unchanged.
+    """
+    pieces = []
+    pos = 0
+    for start, end in spans:
+        start -= base
+        end -= base
+        pieces.append(text[pos:start])
+        pieces.append(re.sub(r"[^\n]", " ", text[start:end]))
+        pos = end
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def _scan_resources(content):
+    """Yield (symbolic_name, resource_type, body, offset) for each resource.
+
+    Only the `resource <name> '<type>' = {` header is matched by regex; the
+    body is delimited by walking to the matching close brace, so nested
+    blocks are handled correctly. Comments inside the body are blanked out
+    so field extraction never sees commented-out code. Headers that don't
+    start a line (commented-out declarations) or that sit inside a previous
+    body are skipped.
+    """
+    resume = 0
+    for m in _RES_HEADER_RE.finditer(content):
+        start = m.start()
+        if start < resume:
+            continue
+        line_start = content.rfind("\n", 0, start) + 1
+        if content[line_start:start].strip():
+            continue
 
-        name_match = re.search(r"name:\s*'([^']+)'", body)
-        display_name = name_match.group(1) if name_match else symbolic_name
+        open_idx = m.end() - 1
+        comments = []
+        close_idx = _find_closing_brace(content, open_idx, comments)
+        if close_idx == -1:
+            close_idx = len(content)
 
-        image_match = re.search(r"image:\s*'([^']+)'", body)
-        image = image_match.group(1) if image_match else None
+        body = content[open_idx + 1:close_idx]
+        if comments:
+            body = _blank_spans(body, comments, open_idx + 1)
+        yield m.group(1), m.group(2), body, start
+        resume = close_idx + 1
 
-        port_match = re.search(r"containerPort:\s*(\d+)", body)
-        port = port_match.group(1) if port_match else None
 
-        if "containers" in resource_type.lower():
-            category = "container"
-        elif "rediscaches" in resource_type.lower():
-            category = "datastore"
-        elif "sqldatabases" in resource_type.lower():
-            category = "datastore"
-        elif "mongodatabases" in resource_type.lower():
-            category = "datastore"
-        elif "applications" in resource_type.lower() and "containers" not in resource_type.lower():
-            category = "application"
-        else:
-            category = "other"
+def parse_bicep(bicep_path):
+    """Parse a Bicep file and extract resources, connections, and line numbers."""
+    with open(bicep_path, "rb") as f:
+        cache_key = _cache_key("bicep", bicep_path, f)
+        if cache_key in _parse_cache:
+            return _parse_cache[cache_key]
+        content = f.read().decode("utf-8")
+
+    resources = []
+    connections = []
+    seen_conns = set()
+
+    # Offsets of every newline, so a resource offset maps to its line number
+    # with a binary search instead of rescanning the file prefix each time.
+    newline_offsets = [m.start() for m in _NEWLINE_RE.finditer(content)]
+
+    for symbolic_name, resource_type, body, offset in _scan_resources(content):
+        line_number = bisect.bisect_left(newline_offsets, offset) + 1
+
+        # The first occurrence of each scalar field wins
+        display_name = image = port = None
+        source_refs = []
+        for m in _BODY_FIELDS_RE.finditer(body):
+            kind = m.lastgroup
+            if kind == "src":
+                source_refs.append(m.group("src"))
+            elif kind == "name":
+                display_name = display_name or m.group("name")
+            elif kind == "image":
+                image = image or m.group("image")
+            elif port is None:
+                port = m.group("port")
+        display_name = display_name or symbolic_name
+
+        category = _categorize(resource_type)
 
         resources.append({
             "symbolic_name": symbolic_name,
@@ -72,47 +263,64 @@ def parse_bicep(bicep_path):
             "line_number": line_number,
         })
 
-        conn_pattern = re.compile(r"connections:\s*\{(.*?)\n\s*\}", re.DOTALL)
-        conn_match = conn_pattern.search(body)
+        conn_match = _CONN_RE.search(body)
         if conn_match:
-            conn_body = conn_match.group(1)
+            # The block holds one nested {...} per entry, so find its real end
+            # by brace matching rather than at the first closing brace.
+            conn_open = conn_match.end() - 1
+            conn_close = _find_closing_brace(body, conn_open)
+            if conn_close == -1:
+                conn_close = len(body)
+            conn_body = body[conn_open + 1:conn_close]
             # Extract source URLs/refs from connection entries
-            source_urls = re.findall(r"source:\s*'([^']+)'", conn_body)
+            source_urls = _CONN_SOURCE_RE.findall(conn_body)
             for source_url in source_urls:
                 # source can be a URL like 'http://http-back-ctnr-simple1:3000'
                 # or a resource ref like 'backend.id'
-                url_match_inner = re.match(r"https?://([^:/]+)", source_url)
+                url_match_inner = _URL_RE.match(source_url)
                 if url_match_inner:
                     target_hostname = url_match_inner.group(1)
                     connections.append({"from": symbolic_name, "to_hostname": target_hostname})
                 else:
-                    connections.append({"from": symbolic_name, "to": source_url})
+                    key = (symbolic_name, source_url)
+                    if key not in seen_conns:
+                        seen_conns.add(key)
+                        connections.append({"from": symbolic_name, "to": source_url})
 
-        source_refs = re.findall(r"source:\s*(\w+)\.(id|connectionString)", body)
-        for ref_name, _ in source_refs:
-            conn = {"from": symbolic_name, "to": ref_name}
-            if conn not in connections:
-                connections.append(conn)
+        for ref_name in source_refs:
+            key = (symbolic_name, ref_name)
+            if key not in seen_conns:
+                seen_conns.add(key)
+                connections.append({"from": symbolic_name, "to": ref_name})
 
     # Resolve hostname-based connections to symbolic names
     # Build lookup: display_name (resource name) -> symbolic_name
     name_to_symbolic = {r["display_name"]: r["symbolic_name"] for r in resources}
 
+    # A hostname can resolve to an edge that a source reference already
+    # produced, so dedupe the resolved (from, to) pairs as well.
     resolved_connections = []
+    resolved_seen = set()
     for conn in connections:
         if "to_hostname" in conn:
             hostname = conn["to_hostname"]
             # Match hostname against resource display names
             target_sym = name_to_symbolic.get(hostname)
-            if target_sym:
-                resolved_connections.append({"from": conn["from"], "to": target_sym})
-            else:
+            if not target_sym:
                 # Hostname didn't match any display name exactly; skip
                 print(f"  Warning: could not resolve connection target hostname '{hostname}'")
+                continue
+            key = (conn["from"], target_sym)
         else:
-            resolved_connections.append(conn)
+            key = (conn["from"], conn["to"])
 
-    return resources, resolved_connections
+        if key not in resolved_seen:
+            resolved_seen.add(key)
+            resolved_connections.append({"from": key[0], "to": key[1]})
+
+    result = (resources, resolved_connections)
+    _parse_cache[cache_key] = result
+    return result
 
 
 def parse_rad_graph_output(output_path):
@@ -142,21 +350,27 @@ def parse_rad_graph_output(output_path):
 
     If the output is not valid JSON, fall back to line-based parsing.
     """
-    with open(output_path, "r") as f:
-        raw = f.read().strip()
+    with open(output_path, "rb") as f:
+        cache_key = _cache_key("rad-graph", output_path, f)
+        if cache_key in _parse_cache:
+            return _parse_cache[cache_key]
+        raw = f.read()
 
     # rad app graph may print status lines (e.g. "Building ...") before the JSON.
     # Strip everything before the first '{' to get clean JSON.
-    json_start = raw.find("{")
+    json_start = raw.find(b"{")
     if json_start > 0:
-        print(f"Skipping {json_start} bytes of non-JSON prefix")
+        # Leading whitespace alone is not worth reporting as a prefix
+        if raw[:json_start].strip():
+            print(f"Skipping {json_start} bytes of non-JSON prefix")
         raw = raw[json_start:]
 
     resources = []
     connections = []
+    seen_conns = set()
 
     try:
-        data = json.loads(raw)
+        data = _json.loads(raw)
 
         # Dynamically infer the bicep filename from metadata or first resource
         bicep_filename = None
@@ -165,8 +379,10 @@ def parse_rad_graph_output(output_path):
         if source_files:
             bicep_filename = source_files[0]
 
-        # Build a lookup: resource id -> resource name
+        # Build lookups: resource id -> resource name, and last id segment ->
+        # resource name so partial ids resolve without scanning every resource.
         id_to_name = {}
+        last_seg_to_name = {}
 
         for res in data.get("resources", []):
             name = res.get("name", "unknown")
@@ -200,15 +416,7 @@ def parse_rad_graph_output(output_path):
                         port = str(cp)
                         break
 
-            # Categorize
-            if "containers" in res_type.lower():
-                category = "container"
-            elif "rediscaches" in res_type.lower() or "sqldatabases" in res_type.lower() or "mongodatabases" in res_type.lower():
-                category = "datastore"
-            elif "applications" in res_type.lower() and "containers" not in res_type.lower():
-                category = "application"
-            else:
-                category = "other"
+            category = _categorize(res_type)
 
             resources.append({
                 "symbolic_name": name,
@@ -223,6 +431,9 @@ def parse_rad_graph_output(output_path):
 
             if res_id:
                 id_to_name[res_id] = name
+                last_seg_to_name.setdefault(res_id.rsplit("/", 1)[-1], name)
+
+        known_names = set(id_to_name.values())
 
         # Parse top-level connections array (new format from rad app graph)
         for conn in data.get("connections", []):
@@ -239,10 +450,7 @@ def parse_rad_graph_output(output_path):
             if not source_name:
                 # Try matching by the last segment of the id
                 source_last = source_id.rstrip("/").rsplit("/", 1)[-1] if "/" in source_id else source_id
-                for rid, rname in id_to_name.items():
-                    if rid.endswith("/" + source_last):
-                        source_name = rname
-                        break
+                source_name = last_seg_to_name.get(source_last, "")
 
             # Resolve targetId to resource name
             target_name = id_to_name.get(target_id, "")
@@ -250,25 +458,26 @@ def parse_rad_graph_output(output_path):
                 # ARM expression like [reference('database').id] — extract the
                 # symbolic name from the reference() call and match it to a
                 # known resource.
-                arm_ref_match = re.match(r"\[reference\('(\w+)'\)", target_id)
+                arm_ref_match = _ARM_REF_RE.match(target_id)
                 if arm_ref_match:
                     ref_sym = arm_ref_match.group(1)
                     # Match the symbolic name to any known resource name
-                    for rname in id_to_name.values():
-                        if rname == ref_sym:
-                            target_name = rname
-                            break
+                    if ref_sym in known_names:
+                        target_name = ref_sym
 
                 # targetId might be a URL like "http://backend:3000"
                 if not target_name:
-                    url_match = re.match(r"https?://([^:/]+)", target_id)
+                    url_match = _URL_RE.match(target_id)
                     if url_match:
                         hostname = url_match.group(1)
-                        # Match hostname to any resource name (may contain hostname as substring)
-                        for rname in id_to_name.values():
-                            if hostname in rname or rname in hostname:
-                                target_name = rname
-                                break
+                        if hostname in known_names:
+                            target_name = hostname
+                        else:
+                            # Match hostname to any resource name (may contain hostname as substring)
+                            for rname in id_to_name.values():
+                                if hostname in rname or rname in hostname:
+                                    target_name = rname
+                                    break
                         if not target_name:
                             # Use hostname itself as the target name
                             target_name = hostname
@@ -276,29 +485,29 @@ def parse_rad_graph_output(output_path):
                 # Plain name — try direct match
                 if not target_name:
                     target_last = target_id.rstrip("/").rsplit("/", 1)[-1] if "/" in target_id else target_id
-                    for rid, rname in id_to_name.items():
-                        if rid.endswith("/" + target_last) or rname == target_last:
-                            target_name = rname
-                            break
-                    if not target_name:
-                        target_name = target_last
+                    target_name = last_seg_to_name.get(target_last, target_last)
 
             if source_name and target_name and source_name != target_name:
-                conn_entry = {"from": source_name, "to": target_name}
-                if conn_entry not in connections:
-                    connections.append(conn_entry)
+                key = (source_name, target_name)
+                if key not in seen_conns:
+                    seen_conns.add(key)
+                    connections.append({"from": source_name, "to": target_name})
 
         print(f"Parsed rad app graph output: {len(resources)} resources, {len(connections)} connections")
         print(f"Inferred bicep filename: {bicep_filename}")
 
-    except (json.JSONDecodeError, KeyError) as e:
+    # Both json.JSONDecodeError and orjson.JSONDecodeError subclass ValueError
+    except (ValueError, KeyError) as e:
         print(f"Warning: Could not parse rad app graph output as JSON ({e})")
         print("Raw output:")
-        print(raw[:500])
+        print(raw[:500].decode("utf-8", errors="replace"))
         print("\nFalling back to direct Bicep parsing...")
-        return None, None, None
+        result = (None, None, None)
+    else:
+        result = (resources, connections, bicep_filename)
 
-    return resources, connections, bicep_filename
+    _parse_cache[cache_key] = result
+    return result
 
 
 def get_github_file_url(repo_owner, repo_name, branch, file_path, line):
@@ -309,90 +518,66 @@ def get_github_file_url(repo_owner, repo_name, branch, file_path, line):
 def generate_mermaid(resources, connections, repo_owner, repo_name, branch, bicep_file):
     """Generate a Mermaid diagram string with clickable nodes and GitHub-like styling."""
 
-    lines = ["graph LR"]
-
-    # --- GitHub light theme styling ---
-    # Matches GitHub's own dependency/action graph look:
-    # white background, light gray borders, clean rounded-corner boxes
-    lines.insert(0, "%%{ init: { 'theme': 'base', 'themeVariables': { "
-                     "'primaryColor': '#ffffff', "
-                     "'primaryTextColor': '#1f2328', "
-                     "'primaryBorderColor': '#d1d9e0', "
-                     "'lineColor': '#2da44e', "
-                     "'secondaryColor': '#f6f8fa', "
-                     "'tertiaryColor': '#ffffff', "
-                     "'background': '#ffffff', "
-                     "'mainBkg': '#ffffff', "
-                     "'nodeBorder': '#d1d9e0', "
-                     "'clusterBkg': '#f6f8fa', "
-                     "'clusterBorder': '#d1d9e0', "
-                     "'fontSize': '14px', "
-                     "'fontFamily': '-apple-system, BlinkMacSystemFont, Segoe UI, Noto Sans, Helvetica, Arial, sans-serif'"
-                     " } } }%%")
-
-    # Class definitions — GitHub light palette with rounded corners
-    # Container: blue accent (like GitHub's blue links/actions)
-    lines.append("    classDef container fill:#ffffff,stroke:#2da44e,stroke-width:1.5px,color:#1f2328,rx:6,ry:6")
-    # Datastore: orange accent (like GitHub's warning/merge colors)
-    lines.append("    classDef datastore fill:#ffffff,stroke:#d4a72c,stroke-width:1.5px,color:#1f2328,rx:6,ry:6")
-    # Other: neutral gray
-    lines.append("    classDef other fill:#ffffff,stroke:#d1d9e0,stroke-width:1.5px,color:#1f2328,rx:6,ry:6")
-
-    resource_map = {r["symbolic_name"]: r for r in resources}
-
-    # Add nodes (skip the top-level application resource)
+    lines = [
+        _MERMAID_THEME_HEADER,
+        "graph LR",
+        _CLASSDEF_CONTAINER,
+        _CLASSDEF_DATASTORE,
+        _CLASSDEF_OTHER,
+    ]
+
+    # Bind hot-loop attribute lookups to locals
+    append = lines.append
+
+    # The top-level application resource is never drawn, so drop it once
+    # up front instead of re-checking the category in every loop.
+    emit_resources = [r for r in resources if r["category"] != "application"]
+    emit_names = {r["symbolic_name"] for r in emit_resources}
+
+    # Edges between drawn resources — filtered once and reused for both the
+    # arrows and their link styles.
+    valid_edges = [
+        (conn["from"], conn["to"])
+        for conn in connections
+        if conn["from"] in emit_names and conn["to"] in emit_names
+    ]
+
+    # Add nodes
     # Use regular box nodes [" "] — rounded corners come from rx/ry in classDef
-    for res in resources:
-        if res["category"] == "application":
-            continue
-
+    for res in emit_resources:
         # Build label — clean, no line numbers (those go in tooltip only)
-        label_parts = ["<b>" + res["display_name"] + "</b>"]
+        label_parts = [f"<b>{res['display_name']}</b>"]
         if res["image"]:
             label_parts.append(res["image"])
         if res["port"]:
-            label_parts.append(":" + res["port"])
+            label_parts.append(f":{res['port']}")
 
         label = "<br/>".join(label_parts)
-        lines.append('    {}["{}"]:::{}'.format(res["symbolic_name"], label, res["category"]))
+        append(f'    {res["symbolic_name"]}["{label}"]{_CLASS_SUFFIX[res["category"]]}')
 
     # Add edges — clean arrow style
-    for conn in connections:
-        if conn["from"] in resource_map and conn["to"] in resource_map:
-            from_res = resource_map[conn["from"]]
-            to_res = resource_map[conn["to"]]
-            if from_res["category"] == "application" or to_res["category"] == "application":
-                continue
-            lines.append("    {} --> {}".format(conn["from"], conn["to"]))
+    for from_sym, to_sym in valid_edges:
+        append(f"    {from_sym} --> {to_sym}")
 
     # Add click directives — tooltip shows source file:line, click opens GitHub
-    for res in resources:
-        if res["category"] == "application":
-            continue
+    for res in emit_resources:
         # Use per-resource source_file if available, otherwise fall back to bicep_file
         res_file = res.get("source_file") or bicep_file
         url = get_github_file_url(repo_owner, repo_name, branch, res_file, res["line_number"])
-        tooltip = "{}:{}" .format(res_file, res["line_number"])
-        lines.append('    click {} href "{}" "{}" _blank'.format(res["symbolic_name"], url, tooltip))
+        tooltip = f"{res_file}:{res['line_number']}"
+        append(f'    click {res["symbolic_name"]} href "{url}" "{tooltip}" _blank')
 
     # Link style — GitHub gray, clean
-    edge_count = 0
-    for conn in connections:
-        if conn["from"] in resource_map and conn["to"] in resource_map:
-            from_res = resource_map[conn["from"]]
-            to_res = resource_map[conn["to"]]
-            if from_res["category"] == "application" or to_res["category"] == "application":
-                continue
-            lines.append("    linkStyle {} stroke:#2da44e,stroke-width:1.5px".format(edge_count))
-            edge_count += 1
+    for edge_index in range(len(valid_edges)):
+        append(f"    linkStyle {edge_index} stroke:#2da44e,stroke-width:1.5px")
 
     return "\n".join(lines)
 
 
 def update_readme(readme_path, mermaid_block):
     """Update the Architecture section in README.md with the Mermaid diagram."""
-    with open(readme_path, "r") as f:
-        content = f.read()
+    readme = Path(readme_path)
+    content = readme.read_bytes().decode("utf-8")
 
     # Build the new Architecture section body
     new_body = "\n".join([
@@ -405,31 +590,67 @@ def update_readme(readme_path, mermaid_block):
         "",
     ])
 
-    # Replace the Architecture section content
-    pattern = re.compile(
-        r"(## Architecture\s*\n).*?(\n## |\Z)",
-        re.DOTALL,
-    )
-
-    if pattern.search(content):
-        new_content = pattern.sub(r"\1" + new_body + "\n" + r"\2", content)
-    else:
+    # Replace the Architecture section content: everything after the heading
+    # line up to the next "## " heading (or end of file). Only a line that is
+    # exactly "## Architecture" (plus trailing whitespace) counts, so headings
+    # like "## Architecture Decisions" are never overwritten.
+    marker = "## Architecture"
+    heading = heading_end = -1
+    search_from = 0
+    while True:
+        if search_from == 0 and content.startswith(marker):
+            candidate = 0
+        else:
+            candidate = content.find("\n" + marker, search_from)
+            if candidate == -1:
+                break
+            candidate += 1
+        line_end = content.find("\n", candidate)
+        if line_end == -1:
+            line_end = len(content)
+        if content[candidate:line_end].rstrip() == marker:
+            heading, heading_end = candidate, line_end
+            break
+        search_from = line_end
+
+    if heading == -1:
         new_content = content + "\n## Architecture\n" + new_body + "\n"
-
-    with open(readme_path, "w") as f:
-        f.write(new_content)
-
+    else:
+        if heading_end == len(content):
+            new_content = content + "\n" + new_body + "\n"
+        else:
+            section_end = content.find("\n## ", heading_end)
+            if section_end == -1:
+                section_end = len(content)
+            new_content = content[:heading_end + 1] + new_body + "\n" + content[section_end:]
+
+    # Leave the file alone on no-op runs so CI sees no diff
+    if new_content == content:
+        print("README.md unchanged")
+        return
+
+    # Write to a sibling temp file and rename it over the README, so an
+    # interrupted run never leaves a truncated file behind.
+    # Any failure along the way removes the temp file before re-raising.
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=readme.parent, prefix=".README.", delete=False) as tmp:
+            tmp_path = tmp.name
+            tmp.write(new_content.encode("utf-8"))
+        shutil.copymode(readme, tmp_path)
+        os.replace(tmp_path, readme)
+    except BaseException:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
     print("README.md updated")
 
 
 def main():
-    repo_root = os.environ.get(
-        "GITHUB_WORKSPACE",
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-    )
+    repo_root = Path(os.environ.get("GITHUB_WORKSPACE", Path(__file__).resolve().parent.parent))
     bicep_file = "app.bicep"
-    bicep_path = os.path.join(repo_root, bicep_file)
-    readme_path = os.path.join(repo_root, "README.md")
+    bicep_path = repo_root / bicep_file
+    readme_path = repo_root / "README.md"
 
     # Repository info for building GitHub URLs for clickable nodes
     repo_owner = os.environ.get("REPO_OWNER", "nithyatsu")
@@ -441,28 +662,41 @@ def main():
     resources = None
     connections = None
 
-    if rad_graph_output and os.path.exists(rad_graph_output):
+    # Missing files are detected by open() itself rather than a separate
+    # os.path.exists() check, avoiding a check-then-open race.
+    if rad_graph_output:
         print(f"Reading rad app graph output from {rad_graph_output}...")
-        resources, connections, inferred_bicep = parse_rad_graph_output(rad_graph_output)
-        # Use the filename from rad app graph output (dynamically inferred)
-        if inferred_bicep:
-            bicep_file = inferred_bicep
-            print(f"Using bicep filename from rad output: {bicep_file}")
+        try:
+            resources, connections, inferred_bicep = parse_rad_graph_output(rad_graph_output)
+        except FileNotFoundError:
+            print(f"Warning: {rad_graph_output} not found")
+        else:
+            # Use the filename from rad app graph output (dynamically inferred)
+            if inferred_bicep:
+                bicep_file = inferred_bicep
+                print(f"Using bicep filename from rad output: {bicep_file}")
 
     # --- Fallback: parse Bicep directly ---
     if resources is None:
-        if not os.path.exists(bicep_path):
+        print(f"Parsing {bicep_path} directly (fallback mode)...")
+        try:
+            resources, connections = parse_bicep(bicep_path)
+        except FileNotFoundError:
             print(f"Error: {bicep_path} not found")
             sys.exit(1)
 
-        print(f"Parsing {bicep_path} directly (fallback mode)...")
-        resources, connections = parse_bicep(bicep_path)
+    if not resources:
+        # Don't replace a hand-maintained or previous diagram with an empty one
+        print("No resources found \u2014 leaving README untouched", file=sys.stderr)
+        sys.exit(0)
 
     print(f"Found {len(resources)} resources and {len(connections)} connections")
-    for r in resources:
-        print("  - {} ({}) @ line {}".format(r["display_name"], r["category"], r["line_number"]))
-    for c in connections:
-        print("  - {} -> {}".format(c["from"], c["to"]))
+    # Per-item listing is opt-in (VERBOSE=1) to keep CI logs short for large apps
+    if os.environ.get("VERBOSE") == "1":
+        listing = [f"  - {r['display_name']} ({r['category']}) @ line {r['line_number']}" for r in resources]
+        listing.extend(f"  - {c['from']} -> {c['to']}" for c in connections)
+        if listing:
+            sys.stdout.write("\n".join(listing) + "\n")
 
     print("\nGenerating Mermaid diagram...")
     mermaid_block = generate_mermaid(
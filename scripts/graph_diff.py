@@ -32,22 +32,37 @@ import subprocess
 import sys
 
 
+# ARM reference expressions (e.g. [reference('database').id]) and URL targets
+_ARM_REF_RE = re.compile(r"\[reference\('(\w+)'\)")
+_URL_RE = re.compile(r"https?://([^:/]+)")
+
+# Resource category keyed by the lower-cased last segment of the type
+# (same mapping as generate_architecture.py)
+_CATEGORY_MAP = {
+    "containers": "container",
+    "rediscaches": "datastore",
+    "sqldatabases": "datastore",
+    "mongodatabases": "datastore",
+    "applications": "application",
+}
+
+
 # ── helpers ──────────────────────────────────────────────────────────
 
-def git_show(sha: str, path: str) -> str | None:
-    """Return file contents at a given commit, or None if missing."""
+def git_show(sha: str, path: str) -> bytes | None:
+    """Return raw file contents at a given commit, or None if missing."""
     try:
         result = subprocess.run(
             ["git", "show", f"{sha}:{path}"],
-            capture_output=True, text=True, check=True,
+            capture_output=True, check=True,
         )
         return result.stdout
     except subprocess.CalledProcessError:
         return None
 
 
-def parse_graph(raw: str | None) -> dict:
-    """Parse app-graph JSON into a normalised dict."""
+def parse_graph(raw: bytes | None) -> dict:
+    """Parse app-graph JSON (raw UTF-8 bytes) into a normalised dict."""
     if not raw:
         return {"resources": {}, "connections": []}
     data = json.loads(raw)
@@ -66,21 +81,13 @@ def resolve_name(res_id: str, resources: dict) -> str:
     if res_id in resources:
         return resources[res_id].get("name", res_id)
     # ARM expression like [reference('database').id]
-    arm_match = re.match(r"\[reference\('(\w+)'\)", res_id)
+    arm_match = _ARM_REF_RE.match(res_id)
     if arm_match:
-        sym = arm_match.group(1)
-        for r in resources.values():
-            if r.get("name") == sym:
-                return sym
-        return sym
+        return arm_match.group(1)
     # URL like http://backend:3000
-    url_match = re.match(r"https?://([^:/]+)", res_id)
+    url_match = _URL_RE.match(res_id)
     if url_match:
-        hostname = url_match.group(1)
-        for r in resources.values():
-            if r.get("name") == hostname:
-                return hostname
-        return hostname
+        return url_match.group(1)
     # Last path segment
     return res_id.rstrip("/").rsplit("/", 1)[-1]
 
@@ -109,14 +116,8 @@ def resource_label(res: dict, repo_owner: str = "", repo_name: str = "", pr_numb
 
 def categorize(res_type: str) -> str:
     """Categorize a resource type."""
-    t = res_type.lower()
-    if "containers" in t:
-        return "container"
-    elif any(ds in t for ds in ["rediscaches", "sqldatabases", "mongodatabases"]):
-        return "datastore"
-    elif "applications" in t and "containers" not in t:
-        return "application"
-    return "other"
+    segment = res_type.split("@", 1)[0].rsplit("/", 1)[-1].lower()
+    return _CATEGORY_MAP.get(segment, "other")
 
 
 def safe_node_id(name: str) -> str:
@@ -135,12 +136,8 @@ def diff_graphs(base: dict, head: dict) -> dict:
     removed = base_ids - head_ids
     common = base_ids & head_ids
 
-    modified = set()
-    for rid in common:
-        if json.dumps(base["resources"][rid], sort_keys=True) != json.dumps(
-            head["resources"][rid], sort_keys=True
-        ):
-            modified.add(rid)
+    # dict/list equality is already a deep, key-order-independent compare
+    modified = {rid for rid in common if base["resources"][rid] != head["resources"][rid]}
 
     base_conns = set(base["connections"])
     head_conns = set(head["connections"])
@@ -349,12 +346,18 @@ def render_diff_section(app_path: str, base_graph: dict, head_graph: dict, diff:
         lines.append("#### Resources\n")
         lines.append("| Status | Resource |")
         lines.append("|--------|----------|")
-        for rid in sorted(diff["added"]):
-            lines.append(f"| 🟢 Added | {resource_label(head_graph['resources'][rid], repo_owner, repo_name, pr_number)} |")
-        for rid in sorted(diff["removed"]):
-            lines.append(f"| 🔴 Removed | {resource_label(base_graph['resources'][rid], repo_owner, repo_name, pr_number)} |")
-        for rid in sorted(diff["modified"]):
-            lines.append(f"| 🟡 Modified | {resource_label(head_graph['resources'][rid], repo_owner, repo_name, pr_number)} |")
+        lines.extend(
+            f"| 🟢 Added | {resource_label(head_graph['resources'][rid], repo_owner, repo_name, pr_number)} |"
+            for rid in sorted(diff["added"])
+        )
+        lines.extend(
+            f"| 🔴 Removed | {resource_label(base_graph['resources'][rid], repo_owner, repo_name, pr_number)} |"
+            for rid in sorted(diff["removed"])
+        )
+        lines.extend(
+            f"| 🟡 Modified | {resource_label(head_graph['resources'][rid], repo_owner, repo_name, pr_number)} |"
+            for rid in sorted(diff["modified"])
+        )
         lines.append("")
 
     # ── Connections table ──
@@ -363,10 +366,14 @@ def render_diff_section(app_path: str, base_graph: dict, head_graph: dict, diff:
         lines.append("#### Connections\n")
         lines.append("| Status | Connection |")
         lines.append("|--------|------------|")
-        for src, tgt in sorted(diff["added_conns"]):
-            lines.append(f"| 🟢 Added | {resolve_name(src, all_resources)} → {resolve_name(tgt, all_resources)} |")
-        for src, tgt in sorted(diff["removed_conns"]):
-            lines.append(f"| 🔴 Removed | {resolve_name(src, all_resources)} → {resolve_name(tgt, all_resources)} |")
+        lines.extend(
+            f"| 🟢 Added | {resolve_name(src, all_resources)} → {resolve_name(tgt, all_resources)} |"
+            for src, tgt in sorted(diff["added_conns"])
+        )
+        lines.extend(
+            f"| 🔴 Removed | {resolve_name(src, all_resources)} → {resolve_name(tgt, all_resources)} |"
+            for src, tgt in sorted(diff["removed_conns"])
+        )
         lines.append("")
 
     # Summary
@@ -394,9 +401,10 @@ def render_no_changes() -> str:
 
 
 def render_full_comment(sections: list) -> str:
-    header = "## � Architecture Changes\n\n"
-    footer = "\n---\n*Powered by [Radius](https://radapp.io/)*\n"
-    return header + "\n".join(sections) + footer
+    header = "## � Architecture Changes\n"
+    footer = "---\n*Powered by [Radius](https://radapp.io/)*\n"
+    # Single join over all fragments instead of concatenating a joined body
+    return "\n".join([header, *sections, footer])
 
 
 # ── main ─────────────────────────────────────────────────────────────
@@ -417,7 +425,7 @@ def main():
     head_raw = None
     if head_graph_path:
         try:
-            with open(head_graph_path, "r") as f:
+            with open(head_graph_path, "rb") as f:
                 head_raw = f.read()
         except FileNotFoundError:
             print(f"Warning: HEAD_GRAPH file not found: {head_graph_path}", file=sys.stderr)